@@ -1,64 +1,282 @@
 from nameparser import HumanName
+from nameparser.config import CONSTANTS
+from collections import namedtuple
 import zipfile
 import os.path
+import pickle
 import sqlite3
+import tempfile
 import operator
+import re
+import math
+import threading
+from array import array
+from bisect import bisect_right
 from datetime import date
 
+_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+_DB_PATH = os.path.join(_DATA_DIR, 'names.sqlite')
+_ZIP_PATH = _DB_PATH + '.zip'
+_SNAPSHOT_PATH = os.path.join(_DATA_DIR, 'names.snapshot')
+_SNAPSHOT_VERSION = 2
+
+# In the column order of the surnames table
+RACES = ('White', 'Black', 'Asian/Pacific Islander',
+         'American Indian / Alaskan Native', 'Two or More Races', 'Hispanic')
+
+# Common words that also appear in the name tables
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from',
+    'had', 'has', 'have', 'he', 'her', 'his', 'i', 'in', 'is', 'it', 'its',
+    'may', 'me', 'my', 'no', 'not', 'of', 'on', 'or', 'our', 'she', 'so',
+    'that', 'the', 'their', 'them', 'then', 'there', 'they', 'this', 'to',
+    'was', 'we', 'were', 'will', 'with', 'you', 'your'})
+_WORD_RE = re.compile(r'\b[A-Za-z]+\b')
+
+
+# first name -> row in the parallel _FIRST_* columns
+_FIRST_INDEX = {}
+_FIRST_TOTAL = array('I')
+_FIRST_MALE = array('I')
+_FIRST_FEMALE = array('I')
+_FIRST_PEAK_YEAR = array('H')
+# surname -> (rank, count, pctwhite, pctblack, pctapi, pctaian, pct2prace,
+#             pcthispanic)
+_SURNAMES = {}
+_UNZIPPED = False
+_LOADED = False
+_LOAD_LOCK = threading.Lock()
+
 
 def database_unzip():
-    file_path = "data/names.sqlite"
-    if not os.path.isfile(file_path):
-        with zipfile.ZipFile(file_path + ".zip", 'r') as zip_ref:
-            zip_ref.extractall("data/")
+    global _UNZIPPED
+    if _UNZIPPED:
+        return
+    if not os.path.isfile(_DB_PATH):
+        with zipfile.ZipFile(_ZIP_PATH, 'r') as zip_ref:
+            zip_ref.extractall(_DATA_DIR)
+    _build_first_agg()
+    _UNZIPPED = True
 
 
-# Returns .first and .last
-def name_parsing(name_str):
-    name_processed = HumanName(name_str)
-    return name_processed
+# One row per first name, aggregated once so loading never scans first
+def _build_first_agg():
+    conn = sqlite3.connect(_DB_PATH, isolation_level=None)
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='first_agg'").fetchone()
+        if exists is None:
+            conn.execute('''CREATE TABLE first_agg (
+                first varchar PRIMARY KEY NOT NULL,
+                male_occurences integer NOT NULL,
+                female_occurences integer NOT NULL,
+                peak_year integer NOT NULL,
+                peak_occurences integer NOT NULL)''')
+            # year is taken from the row holding MAX(occurences)
+            conn.execute('''INSERT INTO first_agg
+                SELECT first,
+                       SUM(CASE WHEN sex = 'M' THEN occurences ELSE 0 END),
+                       SUM(CASE WHEN sex = 'F' THEN occurences ELSE 0 END),
+                       CAST(year AS integer), MAX(occurences)
+                FROM first GROUP BY first''')
+        conn.execute('COMMIT')
+    finally:
+        conn.close()
 
 
-def race(name_str):
+# Read-only connection tuned for scanning whole tables
+def _connect():
+    conn = sqlite3.connect(_DB_PATH)
+    conn.execute('PRAGMA query_only=1')
+    conn.execute('PRAGMA mmap_size=268435456')
+    conn.execute('PRAGMA cache_size=-65536')
+    return conn
+
+
+# (first names, male, female, peak year, surnames) straight from SQLite
+def _read_database():
     database_unzip()
-    last_name = name_parsing(name_str).last.upper()
-    conn = sqlite3.connect('data/names.sqlite')
+    conn = _connect()
     cursor = conn.cursor()
+
+    first_names = []
+    male = array('I')
+    female = array('I')
+    peak_year = array('H')
     cursor.execute(
-        'SELECT pctwhite, pctblack, pctapi, pctaian, pct2prace, pcthispanic FROM surnames WHERE name=?', [last_name])
-    race = cursor.fetchone()
+        'SELECT first, male_occurences, female_occurences, peak_year FROM first_agg')
+    for row in cursor:
+        first_names.append(row[0])
+        male.append(row[1])
+        female.append(row[2])
+        peak_year.append(row[3])
+
+    # Columns are stored as text; CAST turns the Census Bureau's "(S)"
+    # (suppressed small percentage) into 0.0
+    cursor.execute('''SELECT name, CAST(rank AS integer), CAST(count AS integer),
+                             CAST(pctwhite AS real), CAST(pctblack AS real),
+                             CAST(pctapi AS real), CAST(pctaian AS real),
+                             CAST(pct2prace AS real), CAST(pcthispanic AS real)
+                      FROM surnames''')
+    surnames = {row[0]: row[1:] for row in cursor}
     cursor.close()
     conn.close()
-    race_prob = {'White': race[0],
-                 'Black': race[1],
-                 'Asian/Pacific Islander': race[2],
-                 'American Indian / Alaskan Native': race[3],
-                 'Two or More Races': race[4],
-                 'Hispanic': race[5]}
-    max_race = max(race_prob.items(), key=operator.itemgetter(1))[0]
-    return max_race, race_prob[max_race] + "%"
+
+    return first_names, male, female, peak_year, surnames
+
+
+# Size and mtime of the zip and the database the snapshot was built from
+def _source_stamp():
+    stamp = []
+    for path in (_ZIP_PATH, _DB_PATH):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stamp.append(None)
+        else:
+            stamp.append((stat.st_size, stat.st_mtime_ns))
+    return tuple(stamp)
+
+
+# The loaded tables are pickled next to the database so later processes
+# can skip unzipping and SQLite entirely, until either source file changes
+def _read_snapshot():
+    try:
+        with open(_SNAPSHOT_PATH, 'rb') as snapshot:
+            version, stamp, tables = pickle.load(snapshot)
+        first_names, male, female, peak_year, surnames = tables
+    except Exception:
+        # The snapshot is only a cache; anything unreadable is a miss
+        return None
+    if version != _SNAPSHOT_VERSION or stamp != _source_stamp():
+        return None
+    return tables
+
+
+# Each process writes its own temp file, so concurrent first runs cannot
+# replace the snapshot with each other's half-written data
+def _write_snapshot(tables):
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(_SNAPSHOT_PATH), suffix='.tmp')
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'wb') as snapshot:
+            pickle.dump((_SNAPSHOT_VERSION, _source_stamp(), tables), snapshot,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        # mkstemp creates the file owner-only; keep it readable like the database
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, _SNAPSHOT_PATH)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+# Reads both tables into memory once; every lookup after that is a dict hit
+def _ensure_loaded():
+    global _LOADED, _FIRST_INDEX, _FIRST_TOTAL, _FIRST_MALE, _FIRST_FEMALE, \
+        _FIRST_PEAK_YEAR, _SURNAMES
+    if _LOADED:
+        return
+    with _LOAD_LOCK:
+        if _LOADED:
+            return
+        tables = _read_snapshot()
+        if tables is None:
+            tables = _read_database()
+            _write_snapshot(tables)
+        first_names, _FIRST_MALE, _FIRST_FEMALE, _FIRST_PEAK_YEAR, _SURNAMES = tables
+        _FIRST_TOTAL = array('I', map(operator.add, _FIRST_MALE, _FIRST_FEMALE))
+        _FIRST_INDEX = {first: i for i, first in enumerate(first_names)}
+        _LOADED = True
+
+
+# Returns .first and .last
+def name_parsing(name_str):
+    name_processed = HumanName(name_str)
+    return name_processed
+
+
+_Name = namedtuple('_Name', 'first last')
+_NAME_AFFIXES = frozenset(CONSTANTS.suffixes_prefixes_titles) | frozenset(
+    CONSTANTS.conjunctions)
+
+
+# Plain "First Last" skips HumanName; titles, suffixes, commas etc. do not
+def _name_parsing_fast(name_str):
+    parts = name_str.split()
+    if (len(parts) == 2 and parts[0].isalpha() and parts[1].isalpha()
+            and parts[0].lower() not in _NAME_AFFIXES
+            and parts[1].lower() not in _NAME_AFFIXES):
+        return _Name(parts[0], parts[1])
+    return name_parsing(name_str)
+
+
+def race(name_str):
+    _ensure_loaded()
+    last_name = _name_parsing_fast(name_str).last.upper()
+    surname = _SURNAMES.get(last_name)
+    if surname is None:
+        return None
+    race_prob = surname[2:]
+    i = max(range(len(RACES)), key=race_prob.__getitem__)
+    return RACES[i], race_prob[i]
 
 
 def age(name_str):
-    database_unzip()
-    first_name = name_parsing(name_str).first.capitalize()
-    conn = sqlite3.connect('data/names.sqlite')
-    cursor = conn.cursor()
-    cursor.execute(
-        'SELECT year, max(occurences) FROM first WHERE first=?', [first_name])
-    age_lookup = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    print(age_lookup[0])
-    age = int(date.today().year) - int(age_lookup[0])
-    return age, int(age_lookup[0])
+    _ensure_loaded()
+    first_name = _name_parsing_fast(name_str).first.capitalize()
+    i = _FIRST_INDEX.get(first_name)
+    if i is None:
+        return None
+    peak_year = _FIRST_PEAK_YEAR[i]
+    return int(date.today().year) - peak_year, peak_year
 
 
-def sex():
-    database_unzip()
-    return 0
+def sex(name_str):
+    _ensure_loaded()
+    first_name = _name_parsing_fast(name_str).first.capitalize()
+    i = _FIRST_INDEX.get(first_name)
+    if i is None:
+        return None
+    total, male, female = _FIRST_TOTAL[i], _FIRST_MALE[i], _FIRST_FEMALE[i]
+    if male >= female:
+        return 'Male', round(male / total * 100, 2)
+    return 'Female', round(female / total * 100, 2)
 
 
-def crawler():
-    database_unzip()
-    return 0
+# Returns (full name, score) pairs, best match first
+def crawler(text, max_distance=2):
+    _ensure_loaded()
+    first_matches = {}
+    last_matches = {}
+    for pos, match in enumerate(_WORD_RE.finditer(text)):
+        lower_word = match.group().lower()
+        if lower_word in STOP_WORDS:
+            continue
+        word = lower_word[0].upper() + lower_word[1:]
+        i = _FIRST_INDEX.get(word)
+        if i is not None:
+            first_matches[pos] = (word, _FIRST_TOTAL[i])
+        surname = _SURNAMES.get(lower_word.upper())
+        if surname is not None:
+            last_matches[pos] = (word, surname[1])
+
+    # Only last names up to max_distance after a first name can pair with it
+    last_positions = sorted(last_matches)
+    found = {}
+    for first_pos, (first_word, first_count) in first_matches.items():
+        lo = bisect_right(last_positions, first_pos)
+        hi = bisect_right(last_positions, first_pos + max_distance)
+        for last_pos in last_positions[lo:hi]:
+            distance = last_pos - first_pos
+            last_word, last_count = last_matches[last_pos]
+            score = math.log10(first_count * last_count) / distance
+            full_name = first_word + " " + last_word
+            if full_name not in found or score > found[full_name]:
+                found[full_name] = score
+    return sorted(found.items(), key=operator.itemgetter(1), reverse=True)
@@ -1,8 +1,69 @@
-from unittest import TestCase
-from namecrawler.process import race
+import os
+import pickle
+import tempfile
+from datetime import date
+from unittest import TestCase, mock
+from nameparser import HumanName
+from namecrawler import process
+from namecrawler.process import race, age, sex, crawler
 
 class Test(TestCase):
     def test_race(self):
-        names = ["John Smith", "John Jackson"]
-        for name in names:
-            print(name, race(name))
\ No newline at end of file
+        self.assertEqual(race("John Smith"), ("White", 73.35))
+        self.assertEqual(race("John Jackson"), ("Black", 53.02))
+        # Yu has suppressed "(S)" percentages in other columns
+        self.assertEqual(race("Kevin Yu"), ("Asian/Pacific Islander", 96.22))
+        self.assertIsNone(race("John Qxzqxz"))
+
+    def test_name_parsing_fast(self):
+        self.assertEqual(process._name_parsing_fast("John Smith"),
+                         process._Name("John", "Smith"))
+        for name in ["Dr. Mary Smith", "Dr Smith", "John Smith Jr", "Smith, John"]:
+            self.assertIsInstance(process._name_parsing_fast(name), HumanName)
+
+    def test_age(self):
+        self.assertEqual(age("John Smith"), (date.today().year - 1947, 1947))
+        self.assertIsNone(age("Qxzqxz Smith"))
+
+    def test_sex(self):
+        self.assertEqual(sex("John Smith"), ("Male", 99.59))
+        self.assertEqual(sex("Mary Smith"), ("Female", 99.63))
+        self.assertIsNone(sex("Qxzqxz Smith"))
+
+    def test_crawler(self):
+        text = "Yesterday John Smith met with the mayor."
+        names = [name for name, score in crawler(text)]
+        self.assertEqual(names, ["John Smith"])
+
+    def _load_with_snapshot_in(self, snapshot_dir):
+        process._SNAPSHOT_PATH = os.path.join(snapshot_dir, 'names.snapshot')
+        process._LOADED = False
+        process._ensure_loaded()
+
+    def test_snapshot(self):
+        snapshot_path = process._SNAPSHOT_PATH
+        self.addCleanup(setattr, process, '_SNAPSHOT_PATH', snapshot_path)
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            self._load_with_snapshot_in(snapshot_dir)
+            self.assertIsNotNone(process._read_snapshot())
+
+            # A second load comes from the snapshot alone
+            with mock.patch.object(process, '_read_database') as read_database:
+                self._load_with_snapshot_in(snapshot_dir)
+            read_database.assert_not_called()
+            self.assertEqual(race("John Smith"), ("White", 73.35))
+
+            # A changed database forces a reload from SQLite
+            with mock.patch.object(process, '_source_stamp', return_value=(None, None)), \
+                    mock.patch.object(process, '_read_database',
+                                      wraps=process._read_database) as read_database:
+                self._load_with_snapshot_in(snapshot_dir)
+            read_database.assert_called_once()
+
+            # A corrupt or foreign snapshot falls back instead of raising
+            for contents in (b"not a pickle", pickle.dumps(5)):
+                with open(process._SNAPSHOT_PATH, 'wb') as snapshot:
+                    snapshot.write(contents)
+                self._load_with_snapshot_in(snapshot_dir)
+                self.assertEqual(race("John Smith"), ("White", 73.35))
+                self.assertIsNotNone(process._read_snapshot())